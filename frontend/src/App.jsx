@@ -23,12 +23,33 @@ export default function App() {
   const [statusType, setStatusType] = useState('info');
   const [processingFile, setProcessingFile] = useState('');
   const [uploadProgress, setUploadProgress] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [summary, setSummary] = useState(null);
+  const [exporting, setExporting] = useState(false);
+
+  // Totals over every invoice come from the server; the table only holds loaded pages
+  const loadSummary = async () => {
+    try {
+      const res = await axios.get(`${BACKEND_URL}/invoices/summary`);
+      setSummary(res.data);
+    } catch (e) {
+      console.error('Failed to load invoice summary', e);
+    }
+  };
+
+  const loadInvoices = async (before = null) => {
+    const res = await axios.get(`${BACKEND_URL}/invoices`, { params: before ? { before } : {} });
+    const page = res.data.results.map(inv => ({ ...inv, status: 'Processed' }));
+    // First page replaces the list (StrictMode runs the mount effect twice); later pages append
+    setData(prev => (before ? [...prev, ...page] : page));
+    setNextCursor(res.data.next_cursor);
+  };
 
   useEffect(() => {
     (async () => {
       try {
-        const res = await axios.get(`${BACKEND_URL}/invoices`);
-        setData(res.data.map(inv => ({ ...inv, status: 'Processed' })));
+        await Promise.all([loadInvoices(), loadSummary()]);
       } catch (e) {
         console.error('Failed to load invoices', e);
         setStatus('Could not connect to server.', 'error');
@@ -36,12 +57,26 @@ export default function App() {
     })();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await loadInvoices(nextCursor);
+    } catch (e) {
+      console.error('Failed to load more invoices', e);
+      setStatus('Could not load more invoices.', 'error');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const setStatus = (msg, type = 'info') => {
     setStatusMessage(msg);
     setStatusType(type);
   };
 
+  // Trend over every invoice comes from the summary; loaded rows are only a fallback
   const chartData = useMemo(() => {
+    if (summary?.trend) return summary.trend;
     const counts = {};
     data.filter(d => d.status !== 'Failed').forEach(inv => {
       const date = inv.invoice_date && inv.invoice_date !== 'Unknown' ? inv.invoice_date : null;
@@ -52,7 +87,7 @@ export default function App() {
       .map(([date, count]) => ({ date, count }))
       .sort((a, b) => a.date.localeCompare(b.date))
       .slice(-10);
-  }, [data]);
+  }, [data, summary]);
 
   const totalValue = useMemo(() =>
     data.filter(d => d.status !== 'Failed')
@@ -130,6 +165,7 @@ export default function App() {
     }
 
     setData(prev => [...results, ...prev]);
+    loadSummary();
     setFiles([]);
     setProcessingFile('');
     setUploadProgress(0);
@@ -145,8 +181,34 @@ export default function App() {
     }
   };
 
-  const exportToExcel = () => {
-    const rows = data.map(inv => ({
+  // The table only holds loaded pages, so walk every page for the export
+  const fetchAllInvoices = async () => {
+    const invoices = [];
+    let before = null;
+    do {
+      const res = await axios.get(`${BACKEND_URL}/invoices`, {
+        params: { limit: 500, ...(before && { before }) },
+      });
+      invoices.push(...res.data.results.map(inv => ({ ...inv, status: 'Processed' })));
+      before = res.data.next_cursor;
+    } while (before);
+    return invoices;
+  };
+
+  const exportToExcel = async () => {
+    setExporting(true);
+    let invoices;
+    try {
+      invoices = await fetchAllInvoices();
+    } catch (e) {
+      console.error('Failed to fetch invoices for export', e);
+      setStatus('Could not fetch invoices for export.', 'error');
+      return;
+    } finally {
+      setExporting(false);
+    }
+    // Failures from this session are never stored, so add them from the table
+    const rows = [...data.filter(d => d.status === 'Failed'), ...invoices].map(inv => ({
       'Invoice #':      inv.invoice_number || '',
       'Vendor':         inv.vendor_name || '',
       'Date':           inv.invoice_date || '',
@@ -191,7 +253,7 @@ export default function App() {
           <div className="kpi-icon success-icon"><CheckCircle2 size={16} /></div>
           <div>
             <span className="kpi-label">Total Processed</span>
-            <span className="kpi-value">{data.filter(d => d.status !== 'Failed').length}</span>
+            <span className="kpi-value">{summary ? summary.invoice_count : data.filter(d => d.status !== 'Failed').length}</span>
           </div>
         </div>
         <div className="kpi-card">
@@ -205,7 +267,7 @@ export default function App() {
           <div className="kpi-icon money-icon"><DollarSign size={16} /></div>
           <div>
             <span className="kpi-label">Total Value</span>
-            <span className="kpi-value money-value">{formatCurrency(totalValue)}</span>
+            <span className="kpi-value money-value">{formatCurrency(summary ? summary.total_value : totalValue)}</span>
           </div>
         </div>
       </div>
@@ -272,8 +334,8 @@ export default function App() {
             `Process ${files.length > 0 ? files.length + ' ' : ''}Document${files.length !== 1 ? 's' : ''}`
           )}
         </button>
-        <button className="download-btn" onClick={exportToExcel} disabled={data.length === 0}>
-          <Download size={15} /> Export Excel
+        <button className="download-btn" onClick={exportToExcel} disabled={data.length === 0 || exporting}>
+          <Download size={15} /> {exporting ? 'Exporting…' : 'Export Excel'}
         </button>
 
       </div>
@@ -333,6 +395,13 @@ export default function App() {
             )}
           </tbody>
         </table>
+        {nextCursor && (
+          <div className="load-more">
+            <button className="download-btn" onClick={loadMore} disabled={loadingMore}>
+              {loadingMore ? 'Loading…' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -0,0 +1,215 @@
+"""Pure invoice helpers — parsing LLM output and preparing images. No Groq/Supabase calls."""
+import os
+import io
+import re
+import csv
+from datetime import date, datetime
+from functools import lru_cache
+
+from PIL import Image, ImageOps
+from python_calamine import CalamineWorkbook
+
+try:
+    import fitz  # PyMuPDF
+    PDF_SUPPORT = True
+except ImportError:
+    PDF_SUPPORT = False
+
+# Images sent to the vision model are re-encoded as JPEG — several times
+# smaller than PNG for rendered invoices, so uploads to Groq are faster.
+JPEG_QUALITY = 85
+# Vision models gain nothing above ~150 DPI; only the first few pages are read
+PDF_RENDER_DPI = 150
+PDF_MAX_PAGES = 3
+# Longest side for uploaded images — phone photos carry no extra detail past this,
+# only more bytes and image tokens
+IMAGE_MAX_DIM = 1600
+
+
+def file_extension(filename: str) -> str:
+    """Lower-case extension without the dot ("" if none), e.g. "Scan.PDF" → "pdf"."""
+    return os.path.splitext(filename)[1][1:].lower()
+
+
+def format_cell(value) -> str:
+    """Spreadsheet cell as text; whole-number floats drop the ".0" (1001.0 → "1001")."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def excel_row_texts(contents: bytes) -> list:
+    """First sheet of an .xlsx/.xls as one "header: value" text block per non-blank row."""
+    # calamine (Rust) reads both .xlsx and legacy .xls, far faster than openpyxl
+    wb = CalamineWorkbook.from_filelike(io.BytesIO(contents))
+    rows = wb.get_sheet_by_index(0).to_python(skip_empty_area=True)
+    if len(rows) < 2:
+        raise ValueError("Excel file has no data rows (need at least a header + 1 data row).")
+    headers = [str(h) if h not in (None, "") else f"Col{i}" for i, h in enumerate(rows[0])]
+    row_texts = []
+    for row in rows[1:]:
+        if all(v is None or str(v).strip() == "" for v in row):
+            continue
+        row_texts.append("\n".join(
+            f"{h}: {format_cell(v)}" for h, v in zip(headers, row)
+            if v is not None and str(v).strip() != ""
+        ))
+    return row_texts
+
+
+def csv_row_texts(contents: bytes) -> list:
+    """CSV as one "column: value" text block per non-blank row."""
+    # Decode lazily as csv reads instead of materialising the whole text first
+    stream = io.TextIOWrapper(io.BytesIO(contents), encoding="utf-8", errors="replace", newline="")
+    row_texts = []
+    for row in csv.DictReader(stream):
+        if not any(str(v).strip() for v in row.values()):
+            continue  # skip blank rows
+        row_texts.append("\n".join(
+            f"{k}: {v}" for k, v in row.items() if str(v).strip()
+        ))
+    return row_texts
+
+
+# All-numeric date shapes are built straight from the regex groups, no strptime.
+# Each entry lists (year, month, day) group orders to try, in priority order.
+_DATE_NUMERIC = [
+    (re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$"), ((1, 2, 3),)),            # Y-M-D
+    (re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$"), ((3, 1, 2), (3, 2, 1))),  # M/D/Y, D/M/Y
+    (re.compile(r"^(\d{1,2})-(\d{1,2})-(\d{4})$"), ((3, 2, 1), (3, 1, 2))),  # D-M-Y, M-D-Y
+    (re.compile(r"^(\d{4})/(\d{1,2})/(\d{1,2})$"), ((1, 2, 3),)),            # Y/M/D
+]
+
+# Month-name shapes still go through strptime, trying only that shape's formats.
+_DATE_DISPATCH = [
+    (re.compile(r"^[A-Za-z]+\s+\d{1,2},\s+\d{4}$"), ("%B %d, %Y", "%b %d, %Y")),
+    (re.compile(r"^\d{1,2}\s+[A-Za-z]+\s+\d{4}$"), ("%d %B %Y", "%d %b %Y")),
+]
+
+
+def parse_date(date_str: str):
+    """Try many date formats. Returns ISO YYYY-MM-DD string or None."""
+    if not date_str:
+        return None
+    return _parse_date_str(str(date_str).strip())
+
+
+@lru_cache(maxsize=1024)
+def _parse_date_str(s: str):
+    """Cached worker for parse_date — invoices in a batch often share dates."""
+    if s in ("", "Unknown", "N/A", "null", "None"):
+        return None
+    for pattern, orders in _DATE_NUMERIC:
+        m = pattern.match(s)
+        if m is None:
+            continue
+        parts = m.groups()
+        for y, mo, d in orders:
+            try:
+                return date(int(parts[y - 1]), int(parts[mo - 1]), int(parts[d - 1])).isoformat()
+            except ValueError:
+                continue
+        return None
+    for pattern, formats in _DATE_DISPATCH:
+        if not pattern.match(s):
+            continue
+        for fmt in formats:
+            try:
+                return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        return None
+    return None
+
+
+_FLOAT_STRIP = str.maketrans("", "", "$, \t\n\r")  # one C-level pass instead of replace/strip chains
+
+
+def parse_float(value):
+    """Safely parse float, stripping $, commas and whitespace."""
+    if value is None:
+        return None
+    return _parse_float_str(str(value))
+
+
+@lru_cache(maxsize=2048)
+def _parse_float_str(s: str):
+    """Cached worker for parse_float — amounts repeat heavily across rows."""
+    if s.strip() in ("", "N/A", "null", "None"):
+        return None
+    try:
+        return float(s.translate(_FLOAT_STRIP))
+    except ValueError:
+        return None
+
+
+def image_to_jpeg(contents: bytes) -> bytes:
+    """Downscale an image to IMAGE_MAX_DIM and re-encode it as JPEG."""
+    img = Image.open(io.BytesIO(contents))
+    # Let libjpeg decode straight at a reduced scale (no-op for other formats).
+    # draft() only scales down while both sides stay >= the requested size, so
+    # ask for the thumbnail's real target size rather than the square bounding box.
+    scale = IMAGE_MAX_DIM / max(img.size)
+    if scale < 1:
+        img.draft("RGB", (int(img.width * scale), int(img.height * scale)))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white so text on clear backgrounds stays readable
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, "white")
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    else:
+        img = img.convert("RGB")
+    img.thumbnail((IMAGE_MAX_DIM, IMAGE_MAX_DIM), Image.Resampling.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY)
+    return buf.getvalue()
+
+
+def pdf_text(contents: bytes) -> str:
+    """Return the embedded text layer of the first PDF_MAX_PAGES pages ("" for scanned PDFs)."""
+    with fitz.open(stream=contents, filetype="pdf") as doc:
+        return "\n".join(doc[i].get_text("text") for i in range(min(len(doc), PDF_MAX_PAGES)))
+
+
+def pdf_pages_to_jpeg(contents: bytes) -> list:
+    """Render the first PDF_MAX_PAGES pages to JPEG at PDF_RENDER_DPI → [jpeg_bytes, ...]."""
+    images = []
+    with fitz.open(stream=contents, filetype="pdf") as doc:
+        for i in range(min(len(doc), PDF_MAX_PAGES)):
+            # alpha=False: JPEG has no alpha channel
+            pix = doc[i].get_pixmap(dpi=PDF_RENDER_DPI, colorspace=fitz.csRGB, alpha=False)
+            images.append(pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY))
+    return images
+
+
+def sanitize_record(structured: dict, filename: str) -> dict:
+    """Clean LLM output, derive missing fields, return a row ready for Supabase."""
+    parsed_date = parse_date(structured.get("invoice_date"))
+    pre_tax     = parse_float(structured.get("pre_tax_amount"))
+    tax         = parse_float(structured.get("tax_amount"))
+    total       = parse_float(structured.get("total_amount"))
+
+    # Derive missing values from available ones
+    if total is None and pre_tax is not None and tax is not None:
+        total = round(pre_tax + tax, 2)
+    if pre_tax is None and total is not None and tax is not None:
+        pre_tax = round(total - tax, 2)
+
+    payment_status = structured.get("payment_status", "Unknown")
+    if payment_status not in ("Paid", "Unpaid", "Due", "Overdue", "Unknown"):
+        payment_status = "Unknown"
+
+    record = {
+        "invoice_number": str(structured.get("invoice_number") or "N/A"),
+        "vendor_name":    structured.get("vendor_name") or "Unknown",
+        "invoice_date":   parsed_date,   
+        "amount":         pre_tax,      
+        "tax_amount":     tax,
+        "total_amount":   total,
+        "payment_status": payment_status,
+        "source_file":    filename,
+    }
+
+    return record
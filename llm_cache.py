@@ -0,0 +1,105 @@
+"""Exact-match cache for Groq responses, keyed on model + prompt + payload bytes."""
+import os
+import asyncio
+import hashlib
+
+import orjson
+from cachetools import TTLCache
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+REDIS_URL = os.environ.get("REDIS_URL")
+
+CACHE_TTL = 24 * 60 * 60  # seconds
+CACHE_MAXSIZE = 10_000
+
+# Redis when configured (shared by every worker), otherwise a per-process TTL cache
+_redis = redis.from_url(REDIS_URL) if redis is not None and REDIS_URL else None
+_local = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL)
+# Misses currently being computed — concurrent callers for the same key await
+# the first caller's result instead of each calling the LLM.
+_inflight: dict = {}
+
+
+def make_key(model: str, prompt: str, payload: bytes = b"") -> str:
+    """
+    SHA-256 over model, prompt and payload (row text, or a file's digest).
+    Fed incrementally so the payload is never copied into one concatenated buffer.
+    """
+    h = hashlib.sha256(model.encode())
+    h.update(b"\0")
+    h.update(prompt.encode())
+    h.update(b"\0")
+    h.update(payload)
+    return h.hexdigest()
+
+
+def file_digest(contents: bytes) -> str:
+    """SHA-256 of an uploaded file — call via asyncio.to_thread, hashlib releases the GIL on large buffers."""
+    return hashlib.sha256(contents).hexdigest()
+
+
+async def lookup(key: str):
+    """Return the cached result for key, or None on a miss."""
+    if _redis is None:
+        return _local.get(key)
+    try:
+        raw = await _redis.get(f"llm:{key}")
+    except redis.RedisError:
+        return None  # cache is best-effort — fall through to the LLM
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def store(key: str, result: dict):
+    """Cache an LLM result under key for CACHE_TTL seconds."""
+    if _redis is None:
+        _local[key] = result
+        return
+    try:
+        await _redis.set(f"llm:{key}", orjson.dumps(result), ex=CACHE_TTL)
+    except redis.RedisError:
+        pass
+
+
+async def get_or_compute(key: str, compute):
+    """
+    Return the cached result for key, or await compute() once and cache it.
+    Concurrent misses on the same key (e.g. duplicate scans in one ZIP) share a single compute().
+    """
+    cached = await lookup(key)
+    if cached is not None:
+        return cached
+    while (pending := _inflight.get(key)) is not None:
+        try:
+            # shield: a cancelled waiter must not cancel the owner's computation
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise  # this caller was cancelled
+            # The owning task was cancelled (e.g. its request went away) — its
+            # key is gone, so take over and compute instead of failing too.
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await compute()
+        await store(key, result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved — there may be no other waiters
+        raise
+    finally:
+        if not future.done():
+            future.cancel()  # owner cancelled — waiters see it and retry
+        del _inflight[key]
+
+
+async def close():
+    """Release the Redis connection pool, if one was opened."""
+    if _redis is not None:
+        await _redis.aclose()
@@ -1,25 +1,49 @@
 import os
-import io
+import re
 import json
+import logging
+import uuid
 import base64
+import asyncio
 import zipfile
-import csv
+import tempfile
+from contextlib import asynccontextmanager
+
 from datetime import datetime
+from typing import Optional
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from supabase import create_client, Client
-from groq import Groq
-from PIL import Image
-import openpyxl
+from fastapi.responses import ORJSONResponse
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.exceptions import APIError
+from storage3 import AsyncStorageClient
+from storage3.exceptions import StorageApiError
+from groq import AsyncGroq, DEFAULT_TIMEOUT as GROQ_TIMEOUT
+import orjson
+
+import llm_cache
+from invoice_utils import (
+    PDF_SUPPORT,
+    csv_row_texts,
+    excel_row_texts,
+    file_extension,
+    image_to_jpeg,
+    pdf_text,
+    pdf_pages_to_jpeg,
+    sanitize_record,
+)
+
 
-try:
-    import fitz  # PyMuPDF
-    PDF_SUPPORT = True
-except ImportError:
-    PDF_SUPPORT = False
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await http_client.aclose()
+    await llm_cache.close()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,12 +53,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_KEY")
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
+# Optional Supabase Storage bucket — when set, vision images are uploaded there
+# and Groq fetches them by signed URL instead of receiving inline base64.
+SUPABASE_IMAGE_BUCKET = os.environ.get("SUPABASE_IMAGE_BUCKET")
+
+# One pooled HTTP/2 client for every Groq and Supabase call — concurrent requests
+# are multiplexed over warm connections instead of paying a TLS handshake each.
+# Both SDKs send absolute URLs and per-request auth headers, so sharing is safe.
+# The 30s timeout is for Supabase; Groq keeps its own (60s read) default, which it
+# would otherwise inherit from a non-default http_client timeout.
+http_client = httpx.AsyncClient(
+    http2=True,
+    timeout=httpx.Timeout(30.0),
+    limits=httpx.Limits(max_keepalive_connections=32),
+)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY, http_client=http_client, timeout=GROQ_TIMEOUT)
+# Async PostgREST client for the Supabase REST API — awaits inserts/selects
+# instead of blocking the event loop like supabase-py's sync client.
+db = AsyncPostgrestClient(
+    f"{SUPABASE_URL}/rest/v1",
+    headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+    http_client=http_client,
+)
+storage = AsyncStorageClient(
+    f"{SUPABASE_URL}/storage/v1/",
+    {"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}"},
+    http_client=http_client,
+) if SUPABASE_IMAGE_BUCKET else None
 
 SUPPORTED_EXTENSIONS = {
     "png", "jpg", "jpeg", "webp", "gif",
@@ -43,65 +93,37 @@ SUPPORTED_EXTENSIONS = {
     "xlsx", "xls", "csv"
 }
 
+# Max in-flight Groq requests across the whole process — uploads, ZIP members
+# and spreadsheet rows all share it, so bursts stay under Groq rate limits.
+GROQ_CONCURRENCY = 10
+groq_semaphore = asyncio.Semaphore(GROQ_CONCURRENCY)
 
-def parse_date(date_str: str):
-    """Try many date formats. Returns ISO YYYY-MM-DD string or None."""
-    if not date_str or str(date_str).strip() in ("", "Unknown", "N/A", "null", "None"):
-        return None
-    s = str(date_str).strip()
-    formats = [
-        "%Y-%m-%d", "%m/%d/%Y", "%d/%m/%Y",
-        "%B %d, %Y", "%b %d, %Y",
-        "%d-%m-%Y", "%m-%d-%Y",
-        "%d %B %Y", "%d %b %Y",
-        "%Y/%m/%d",
-    ]
-    for fmt in formats:
-        try:
-            return datetime.strptime(s, fmt).strftime("%Y-%m-%d")
-        except ValueError:
-            continue
-    return None  
+# Max ZIP members decompressed and in flight at once per upload.
+ZIP_CONCURRENCY = 8
 
+# PDFs with at least this much embedded text skip the vision model
+PDF_TEXT_MIN_CHARS = 200
 
-def parse_float(value):
-    """Safely parse float, stripping $, commas, spaces."""
-    if value is None or str(value).strip() in ("", "N/A", "null", "None"):
-        return None
-    try:
-        return float(str(value).replace("$", "").replace(",", "").replace(" ", "").strip())
-    except (ValueError, TypeError):
-        return None
-
+# ZIP uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
 
-def image_to_base64(contents: bytes, filename: str):
-    """Convert image bytes to base64. Auto-converts TIFF/BMP → PNG."""
-    ext = filename.lower().split(".")[-1]
-    media_type_map = {
-        "jpg": "image/jpeg", "jpeg": "image/jpeg",
-        "png": "image/png", "webp": "image/webp", "gif": "image/gif",
-    }
-    media_type = media_type_map.get(ext, "image/jpeg")
-    if ext in ("tiff", "tif", "bmp"):
-        img = Image.open(io.BytesIO(contents))
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        contents = buf.getvalue()
-        media_type = "image/png"
-    return base64.b64encode(contents).decode("utf-8"), media_type
+# Columns the dashboard reads — /invoices never ships the rest of the row
+INVOICE_COLUMNS = (
+    "id,invoice_number,vendor_name,invoice_date,amount,tax_amount,"
+    "total_amount,payment_status,source_file,upload_timestamp"
+)
+INVOICE_PAGE_MAX = 500
 
+# Signed image URLs only need to live until Groq has fetched them
+SIGNED_URL_TTL = 10 * 60  # seconds
 
-def pdf_first_page_to_base64(contents: bytes):
-    """Render first page of PDF to PNG base64 at 2x zoom for clarity."""
-    doc = fitz.open(stream=contents, filetype="pdf")
-    page = doc[0]
-    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-    return base64.b64encode(pix.tobytes("png")).decode("utf-8"), "image/png"
 
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+TEXT_MODEL = "llama-3.3-70b-versatile"
 
-def call_vision_model(b64: str, media_type: str) -> dict:
-    """Send image to Groq vision model → structured invoice JSON."""
-    prompt = """You are an invoice data extraction assistant. Look at this invoice image carefully.
+# Kept byte-for-byte constant so Groq's prompt-prefix cache can hit across calls
+VISION_PROMPT = """You are an invoice data extraction assistant. Look at this invoice image carefully.
+If there are several images, they are consecutive pages of the same invoice.
 
 Extract the following fields and return ONLY a valid JSON object — no explanation, no markdown, no code fences.
 
@@ -118,26 +140,10 @@ Rules:
 - All number fields must be plain numbers like 1234.56, NOT strings.
 - If a field cannot be found, use null for numbers and "Unknown" for strings.
 - Do not invent values."""
+_VISION_PROMPT_PART = {"type": "text", "text": VISION_PROMPT}  # reused in every request
 
-    response = groq_client.chat.completions.create(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        messages=[{
-            "role": "user",
-            "content": [
-                {"type": "image_url", "image_url": {"url": f"data:{media_type};base64,{b64}"}},
-                {"type": "text", "text": prompt}
-            ]
-        }],
-        temperature=0.1,
-        max_tokens=1024,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-def call_text_model(row_text: str) -> dict:
-    """Extract invoice fields from spreadsheet row text using LLM."""
-    prompt = f"""You are an invoice data extraction assistant.
+# Row text is appended after this fixed prefix, so the prefix is cacheable too
+TEXT_PROMPT_PREFIX = """You are an invoice data extraction assistant.
 
 Extract the following fields from this invoice row data and return ONLY a valid JSON object — no explanation, no markdown, no code fences.
 
@@ -156,108 +162,190 @@ Rules:
 - Do not invent values. Column names may vary — use best judgment to map them.
 
 Invoice row data:
-{row_text}"""
-
-    response = groq_client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=512,
-        response_format={"type": "json_object"},
-    )
-    return json.loads(response.choices[0].message.content)
-
-
-def sanitize_and_save(structured: dict, filename: str) -> dict:
-    """Clean LLM output, derive missing fields, save to Supabase, return record."""
-    parsed_date = parse_date(structured.get("invoice_date"))
-    pre_tax     = parse_float(structured.get("pre_tax_amount"))
-    tax         = parse_float(structured.get("tax_amount"))
-    total       = parse_float(structured.get("total_amount"))
-
-    # Derive missing values from available ones
-    if total is None and pre_tax is not None and tax is not None:
-        total = round(pre_tax + tax, 2)
-    if pre_tax is None and total is not None and tax is not None:
-        pre_tax = round(total - tax, 2)
-
-    payment_status = structured.get("payment_status", "Unknown")
-    if payment_status not in ("Paid", "Unpaid", "Due", "Overdue", "Unknown"):
-        payment_status = "Unknown"
-
-    record = {
-        "invoice_number": str(structured.get("invoice_number") or "N/A"),
-        "vendor_name":    structured.get("vendor_name") or "Unknown",
-        "invoice_date":   parsed_date,   
-        "amount":         pre_tax,      
-        "tax_amount":     tax,
-        "total_amount":   total,
-        "payment_status": payment_status,
-        "source_file":    filename,
+"""
+
+
+def _is_client_error(status) -> bool:
+    """StorageApiError.status may be an int or a numeric string."""
+    try:
+        return 400 <= int(status) < 500
+    except (TypeError, ValueError):
+        return False
+
+
+async def image_url(jpeg: bytes, name: str) -> str:
+    """
+    URL Groq can fetch a JPEG from: a signed Supabase Storage URL when a bucket
+    is configured, otherwise an inline base64 data URL.
+    """
+    global storage
+    if storage is not None:
+        bucket = storage.from_(SUPABASE_IMAGE_BUCKET)
+        try:
+            # Named after the content hash, so re-uploads overwrite the same object
+            await bucket.upload(name, jpeg, {"content-type": "image/jpeg", "upsert": "true"})
+            signed = await bucket.create_signed_url(name, SIGNED_URL_TTL)
+            return signed["signedURL"]
+        except StorageApiError as e:
+            if not _is_client_error(e.status):
+                logger.warning("Supabase Storage upload of %s failed, sending it inline: %s", name, e)
+            elif storage is not None:
+                # 4xx is misconfiguration (bucket name, RLS, key) that would fail on every
+                # image — stop trying for this process rather than paying two dead round-trips each time.
+                logger.error(
+                    "Supabase Storage rejected uploads to bucket %r, sending images inline from now on: %s",
+                    SUPABASE_IMAGE_BUCKET, e,
+                )
+                storage = None
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            # Transient (timeout, dropped connection, or a gateway error page that
+            # storage3 fails to parse as JSON) — fall back for this image only
+            logger.warning("Supabase Storage upload of %s failed, sending it inline: %s", name, e)
+    return "data:image/jpeg;base64," + base64.b64encode(jpeg).decode("utf-8")
+
+
+async def call_vision_model(contents: bytes, encode) -> dict:
+    """
+    Send image(s) to Groq vision model → structured invoice JSON.
+    Cached on the file's SHA-256; encode(contents) → [jpeg_bytes, ...] only runs on a miss.
+    Concurrent calls with the same bytes share one Groq request.
+    """
+    async def request() -> dict:
+        jpegs = await asyncio.to_thread(encode, contents)
+        urls = await asyncio.gather(*(
+            image_url(jpeg, f"{digest}-{page}.jpg") for page, jpeg in enumerate(jpegs)
+        ))
+        images = [{"type": "image_url", "image_url": {"url": url}} for url in urls]
+        async with groq_semaphore:
+            response = await groq_client.chat.completions.create(
+                model=VISION_MODEL,
+                messages=[{
+                    "role": "user",
+                    "content": [*images, _VISION_PROMPT_PART]
+                }],
+                temperature=0.1,
+                max_tokens=1024,
+                response_format={"type": "json_object"},
+            )
+        return orjson.loads(response.choices[0].message.content)
+
+    # Hashed once off the event loop: keys the cache and names the Storage objects
+    digest = await asyncio.to_thread(llm_cache.file_digest, contents)
+    key = llm_cache.make_key(VISION_MODEL, VISION_PROMPT, digest.encode())
+    return await llm_cache.get_or_compute(key, request)
+
+
+async def call_text_model(row_text: str) -> dict:
+    """Extract invoice fields from spreadsheet row text (or a PDF text layer) using LLM."""
+    async def request() -> dict:
+        async with groq_semaphore:
+            response = await groq_client.chat.completions.create(
+                model=TEXT_MODEL,
+                messages=[{"role": "user", "content": TEXT_PROMPT_PREFIX + row_text}],
+                temperature=0.1,
+                max_tokens=512,
+                response_format={"type": "json_object"},
+            )
+        return orjson.loads(response.choices[0].message.content)
+
+    key = llm_cache.make_key(TEXT_MODEL, TEXT_PROMPT_PREFIX, row_text.encode())
+    return await llm_cache.get_or_compute(key, request)
+
+
+async def save_records(records: list) -> list:
+    """
+    Insert records into Supabase with a single request.
+    If PostgREST rejects the batch, fall back to row-by-row inserts to isolate the bad rows.
+    Transport errors (timeouts, dropped connections) propagate: the batch may have been
+    committed, and retrying row by row could insert it twice.
+    Returns one entry per record: None if saved, otherwise the APIError.
+    """
+    if not records:
+        return []
+    try:
+        await db.from_("invoices").insert(records).execute()
+        return [None] * len(records)
+    except APIError:
+        if len(records) == 1:
+            raise
+    # Error path — insert one at a time rather than firing len(records) requests at once
+    return [await _insert_one(record) for record in records]
+
+
+async def _insert_one(record: dict):
+    try:
+        await db.from_("invoices").insert(record).execute()
+    except APIError as e:
+        return e
+    return None
+
+
+def saved_result(record: dict, error) -> dict:
+    """Response entry for a record after save_records."""
+    if error is None:
+        return {**record, "status": "Processed"}
+    return {
+        "source_file": record["source_file"],
+        "status": "Failed",
+        "vendor_name": f"Error: Saving failed: {str(error)}"
     }
 
-    supabase.table("invoices").insert(record).execute()
-    return record
 
+async def extract_rows(row_texts: list, filename: str) -> list:
+    """Run the text model over spreadsheet rows concurrently (bounded by groq_semaphore)."""
+    # Identical rows are common in exports — call the model once per distinct row
+    unique = list(dict.fromkeys(row_texts))
+    results = await asyncio.gather(*(call_text_model(row_text) for row_text in unique))
+    by_text = dict(zip(unique, results))
+    return [sanitize_record(by_text[row_text], filename) for row_text in row_texts]
 
-def process_single_file(contents: bytes, filename: str) -> list:
+
+async def extract_records(contents: bytes, filename: str) -> list:
     """
-    Process one file of any supported type.
+    Extract invoice records from one file of any supported type (no DB write).
     Always returns a LIST of records (Excel/CSV may produce multiple).
     """
-    ext = filename.lower().split(".")[-1]
+    ext = file_extension(filename)
 
 
+    # Parsing, rendering and encoding are CPU-bound — keep them off the event loop
     if ext in ("xlsx", "xls"):
-        wb = openpyxl.load_workbook(io.BytesIO(contents), data_only=True)
-        ws = wb.active
-        rows = list(ws.iter_rows(values_only=True))
-        if len(rows) < 2:
-            raise ValueError("Excel file has no data rows (need at least a header + 1 data row).")
-        headers = [str(h) if h is not None else f"Col{i}" for i, h in enumerate(rows[0])]
-        records = []
-        for row in rows[1:]:
-            if all(v is None or str(v).strip() == "" for v in row):
-                continue  
-            row_text = "\n".join(
-                f"{h}: {v}" for h, v in zip(headers, row)
-                if v is not None and str(v).strip() != ""
-            )
-            structured = call_text_model(row_text)
-            record = sanitize_and_save(structured, filename)
-            records.append({**record, "status": "Processed"})
-        return records
+        row_texts = await asyncio.to_thread(excel_row_texts, contents)
+        return await extract_rows(row_texts, filename)
 
    
     if ext == "csv":
-        text = contents.decode("utf-8", errors="replace")
-        reader = csv.DictReader(io.StringIO(text))
-        records = []
-        for row in reader:
-            if not any(str(v).strip() for v in row.values()):
-                continue  # skip blank rows
-            row_text = "\n".join(
-                f"{k}: {v}" for k, v in row.items() if str(v).strip()
-            )
-            structured = call_text_model(row_text)
-            record = sanitize_and_save(structured, filename)
-            records.append({**record, "status": "Processed"})
-        return records
+        row_texts = await asyncio.to_thread(csv_row_texts, contents)
+        return await extract_rows(row_texts, filename)
 
    
     if ext == "pdf":
         if not PDF_SUPPORT:
             raise ValueError("PDF support not available — add 'pymupdf' to requirements.txt and redeploy.")
-        b64, media_type = pdf_first_page_to_base64(contents)
-        structured = call_vision_model(b64, media_type)
-        record = sanitize_and_save(structured, filename)
-        return [{**record, "status": "Processed"}]
+        text = await asyncio.to_thread(pdf_text, contents)
+        if len(text.strip()) >= PDF_TEXT_MIN_CHARS:
+            # Digital PDF — its text layer goes to the text model, far cheaper than vision
+            structured = await call_text_model(text)
+        else:
+            structured = await call_vision_model(contents, pdf_pages_to_jpeg)
+        return [sanitize_record(structured, filename)]
 
    
-    b64, media_type = image_to_base64(contents, filename)
-    structured = call_vision_model(b64, media_type)
-    record = sanitize_and_save(structured, filename)
-    return [{**record, "status": "Processed"}]
+    structured = await call_vision_model(contents, lambda data: [image_to_jpeg(data)])
+    return [sanitize_record(structured, filename)]
+
+
+
+async def spool_upload(file: UploadFile):
+    """Copy an upload to a temp file in chunks so large ZIPs are never held in memory whole."""
+    # TemporaryFile rather than SpooledTemporaryFile: zipfile needs seekable(),
+    # which SpooledTemporaryFile only gained in Python 3.11.
+    buf = tempfile.TemporaryFile()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        # Disk writes happen in a worker thread so the event loop stays free
+        await asyncio.to_thread(buf.write, chunk)
+    buf.seek(0)
+    return buf
 
 
 
@@ -272,7 +360,7 @@ def home():
 
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Diagnostic endpoint — visit in browser to confirm all services are up."""
     results = {
         "server": "ok",
@@ -280,7 +368,7 @@ def health_check():
         "pdf_support": PDF_SUPPORT,
     }
     try:
-        supabase.table("invoices").select("id").limit(1).execute()
+        await db.from_("invoices").select("id").limit(1).execute()
         results["supabase"] = "ok"
     except Exception as e:
         results["supabase"] = f"ERROR: {str(e)}"
@@ -290,38 +378,64 @@ def health_check():
 
 @app.post("/upload")
 async def process_document(file: UploadFile = File(...)):
-    contents = await file.read()
     filename = file.filename or "upload"
-    ext = filename.lower().split(".")[-1]
+    ext = file_extension(filename)
 
 
     if ext == "zip":
-        if not zipfile.is_zipfile(io.BytesIO(contents)):
+        buf = await spool_upload(file)
+        # ZipFile validates the archive itself — no separate is_zipfile() scan
+        try:
+            zf = zipfile.ZipFile(buf)
+        except zipfile.BadZipFile:
+            buf.close()
             raise HTTPException(status_code=400, detail="Invalid or corrupted ZIP file.")
 
         all_results = []
         skipped = []
+        members = []
+        sem = asyncio.Semaphore(ZIP_CONCURRENCY)
 
-        with zipfile.ZipFile(io.BytesIO(contents)) as zf:
-            for name in zf.namelist():
-               
-                if name.startswith("__") or name.startswith(".") or name.endswith("/"):
+        with buf, zf:
+            for info in zf.infolist():
+                name = info.filename
+                if name.startswith(("__", ".")) or info.is_dir():
                     continue
-                inner_ext = name.lower().split(".")[-1]
-                if inner_ext not in SUPPORTED_EXTENSIONS:
+                if file_extension(name) not in SUPPORTED_EXTENSIONS:
                     skipped.append(name)
                     continue
-                try:
-                    inner_contents = zf.read(name)
-                    inner_filename = name.split("/")[-1]  
-                    records = process_single_file(inner_contents, inner_filename)
-                    all_results.extend(records)
-                except Exception as e:
-                    all_results.append({
-                        "source_file": name,
-                        "status": "Failed",
-                        "vendor_name": f"Error: {str(e)}"
-                    })
+                members.append(info)
+
+            async def process_member(info: zipfile.ZipInfo) -> list:
+                async with sem:
+                    inner_filename = info.filename.split("/")[-1]
+                    # zlib releases the GIL, so members inflate in parallel and
+                    # overlap with other members' Groq calls
+                    inner_contents = await asyncio.to_thread(zf.read, info)
+                    return await extract_records(inner_contents, inner_filename)
+
+            # Members are independent and network-bound, so run them concurrently
+            outcomes = await asyncio.gather(
+                *(process_member(info) for info in members), return_exceptions=True
+            )
+
+        # One bulk insert for the whole archive instead of one per file
+        # BaseException, not Exception: gather also hands back CancelledError outcomes
+        extracted = [r for outcome in outcomes if not isinstance(outcome, BaseException) for r in outcome]
+        try:
+            save_errors = iter(await save_records(extracted))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Saving failed: {str(e)}")
+
+        for info, outcome in zip(members, outcomes):
+            if isinstance(outcome, BaseException):
+                all_results.append({
+                    "source_file": info.filename,
+                    "status": "Failed",
+                    "vendor_name": f"Error: {str(outcome)}"
+                })
+            else:
+                all_results.extend(saved_result(r, next(save_errors)) for r in outcome)
 
         return {
             "status": "Success",
@@ -338,14 +452,17 @@ async def process_document(file: UploadFile = File(...)):
             detail=f"Unsupported file type '.{ext}'. Supported: {', '.join(sorted(SUPPORTED_EXTENSIONS))}, zip."
         )
 
+    contents = await file.read()
     try:
-        records = process_single_file(contents, filename)
+        records = await extract_records(contents, filename)
+        save_errors = await save_records(records)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
-  
+    records = [saved_result(r, err) for r, err in zip(records, save_errors)]
+
     if len(records) == 1:
         return {"status": "Success", "data": records[0]}
 
@@ -358,8 +475,68 @@ async def process_document(file: UploadFile = File(...)):
     }
 
 
+@app.get("/invoices/summary")
+async def get_invoice_summary():
+    """Dashboard totals and trend over every invoice, aggregated in Postgres (see invoice_summary() in the README)."""
+    response = await db.rpc("invoice_summary", {}).execute()
+    return response.data[0]
+
+
+# Postgres trims trailing zeros from fractional seconds; Python 3.10's
+# fromisoformat only accepts 3 or 6 digits, so pad them back out.
+_FRACTION = re.compile(r"\.(\d{1,6})(?=[+-]|Z|$)")
+
+
+def parse_cursor(cursor: str):
+    """
+    Validate an /invoices cursor — "<upload_timestamp>,<id>" or a bare timestamp.
+    Returns (iso_timestamp, uuid_str or None) re-serialised from the parsed values,
+    so nothing from the raw string reaches the PostgREST filter.
+    """
+    timestamp, _, last_id = cursor.rpartition(",")
+    if not timestamp:
+        timestamp, last_id = last_id, None
+    try:
+        ts = _FRACTION.sub(lambda m: "." + m[1].ljust(6, "0"), timestamp.strip(), count=1)
+        if ts.endswith("Z"):
+            ts = ts[:-1] + "+00:00"
+        parsed_ts = datetime.fromisoformat(ts).isoformat()
+        parsed_id = str(uuid.UUID(last_id)) if last_id is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return parsed_ts, parsed_id
+
+
 @app.get("/invoices")
-async def get_invoices():
-    """Return all invoices from Supabase ordered by most recent first."""
-    response = supabase.table("invoices").select("*").order("upload_timestamp", desc=True).execute()
-    return response.data
+async def get_invoices(
+    limit: int = Query(100, ge=1, le=INVOICE_PAGE_MAX),
+    before: Optional[str] = None,
+):
+    """
+    Return one page of invoices, most recent first.
+    Pass the previous page's next_cursor as `before` to get the next page; it is None on the last page.
+    """
+    query = (
+        db.from_("invoices")
+        .select(INVOICE_COLUMNS)
+        .order("upload_timestamp", desc=True)
+        .order("id", desc=True)
+        .limit(limit)
+    )
+    if before:
+        timestamp, last_id = parse_cursor(before)
+        if last_id is None:
+            query = query.lt("upload_timestamp", timestamp)
+        else:
+            # The id breaks ties between rows saved by the same bulk insert, which share a timestamp
+            query = query.or_(
+                f'upload_timestamp.lt."{timestamp}",'
+                f'and(upload_timestamp.eq."{timestamp}",id.lt."{last_id}")'
+            )
+    response = await query.execute()
+    rows = response.data
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = f"{last['upload_timestamp']},{last['id']}"
+    return {"results": rows, "next_cursor": next_cursor}